@@ -5,20 +5,307 @@
 支持增删改查操作
 """
 
+import atexit
+import heapq
 import json
+import logging
+import mmap
+import re
+import select
+import signal
 import sys
 import os
+import tempfile
+import threading
+from collections import defaultdict
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, List, Optional
 try:
     from pypinyin import pinyin, Style
     PYPINYIN_AVAILABLE = True
 except ImportError:
     PYPINYIN_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 错误信息走 stderr 日志，避免与 stdout 上的 MCP 协议输出交错
+logger = logging.getLogger(__name__)
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    logger.addHandler(_handler)
+logger.setLevel(logging.WARNING)
+
+
+@lru_cache(maxsize=256)
+def _warn_once(message: str) -> None:
+    """相同内容的告警只输出一次，磁盘故障风暴下不会刷屏"""
+    logger.warning(message)
+
 
 # 数据存储文件路径
 DATA_FILE = os.path.join(os.path.dirname(__file__), "person_data.json")
 
+# 变更日志路径：每次变更追加一行，快照落盘后清空，崩溃时据此恢复
+JOURNAL_FILE = os.path.join(os.path.dirname(__file__), "person_data.jsonl")
+
+# 默认保存紧凑 JSON；设置 PRETTY=1 可保留带缩进的可读格式
+PRETTY_SAVE = os.environ.get("PRETTY") == "1"
+
+# 写回阈值：累计多少次未落盘的变更后强制保存一次
+FLUSH_EVERY = 32
+
+# 去抖间隔（秒）：一批连续变更停止该时长后才真正落盘
+FLUSH_DEBOUNCE = 0.5
+
+# 数据文件超过该大小时改用 mmap 读取，由页缓存直接供解析器使用
+MMAP_THRESHOLD = 1 << 20
+
+# 字典 pop/get 的缺失哨兵，把存在性检查与取值合并成一次查找
+_MISSING = object()
+
+# 匹配类型的规范常量：非 ASCII 短串不会被解释器自动驻留，
+# 统一引用同一对象后哈希值缓存在对象上，查表与比较都省去逐字符工作
+_MT_PREFIX = "前两个字匹配"
+_MT_SUFFIX = "后两个字匹配"
+_MT_CONTAINS = "包含匹配"
+_MT_PY_PREFIX = "拼音前两个字匹配"
+_MT_PY_SUFFIX = "拼音后两个字匹配"
+_MT_PY_CONTAINS = "拼音包含匹配"
+
+# 各匹配类型的基础分，一次哈希查找代替逐个字符串比较
+_BASE_SCORES = {
+    _MT_PREFIX: 100,
+    _MT_PY_PREFIX: 95,
+    _MT_SUFFIX: 80,
+    _MT_PY_SUFFIX: 75,
+    _MT_CONTAINS: 60,
+    _MT_PY_CONTAINS: 55,
+}
+
+# 中文字符检测（预编译，C 层扫描代替逐字符 Python 比较）
+_CJK_RE = re.compile('[\\u4e00-\\u9fff]')
+
+# update_person 可更新的字段分组
+_BIRTH_KEYS = frozenset({'birth_year', 'birth_month', 'birth_day', 'birth_hour', 'birth_minute'})
+_LOC_KEYS = frozenset({'city', 'latitude', 'longitude'})
+
+# 各月天数（二月按平年，闰年在校验时单独加一天）
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _is_leap(year: int) -> bool:
+    """判断是否为闰年"""
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def _valid_date(year: int, month: int, day: int, hour: int, minute: int) -> bool:
+    """用纯整数比较校验日期时间，避免只为校验而构造 datetime 对象"""
+    if not (1 <= year <= 9999 and 1 <= month <= 12):
+        return False
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        return False
+    max_day = _DAYS_IN_MONTH[month - 1] + (1 if month == 2 and _is_leap(year) else 0)
+    return 1 <= day <= max_day
+
+
+def _to_pinyin(text: str) -> str:
+    """将中文文本转换为不带声调的拼音串"""
+    if not PYPINYIN_AVAILABLE:
+        return ""
+
+    try:
+        # 转换为拼音，不带声调，合并为字符串
+        pinyin_list = pinyin(text, style=Style.NORMAL)
+        return ''.join([item[0] for item in pinyin_list]).lower()
+    except Exception:
+        return ""
+
+
+def _batch_pinyin(names) -> Dict[str, str]:
+    """一次 pypinyin 调用批量转换多个姓名，摊薄每次调用的查表开销"""
+    if not names:
+        return {}
+    sentinel = '|'
+    try:
+        pinyin_list = pinyin(sentinel.join(names), style=Style.NORMAL)
+        flat = ''.join(item[0] for item in pinyin_list).lower()
+        parts = flat.split(sentinel)
+        if len(parts) == len(names):
+            return dict(zip(names, parts))
+    except Exception:
+        pass
+    # 拆分数量对不上（例如姓名本身含分隔符）时退回逐个转换
+    return {name: _to_pinyin(name) for name in names}
+
+
+@lru_cache(maxsize=256)
+def _query_pinyin(text: str) -> str:
+    """查询词的拼音转换，带缓存，重复查询直接命中"""
+    return _to_pinyin(text)
+
+
+def _validate_coords(latitude: float, longitude: float) -> Optional[str]:
+    """校验经纬度范围，非法时返回错误信息，合法时返回 None"""
+    if not (-90.0 <= latitude <= 90.0):
+        return "纬度必须在-90到90之间"
+    if not (-180.0 <= longitude <= 180.0):
+        return "经度必须在-180到180之间"
+    return None
+
+
+def _fmt_dt(year: int, month: int, day: int, hour: int, minute: int) -> str:
+    """拼出 "YYYY-MM-DD HH:MM" 字符串（% 格式化走 C 层，比逐个格式说明符便宜）"""
+    return "%04d-%02d-%02d %02d:%02d" % (year, month, day, hour, minute)
+
+
+def _json_loads(data):
+    """解析 JSON（bytes 或 str，优先使用 orjson）"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps_bytes(obj) -> bytes:
+    """序列化为 JSON bytes，直接写 stdout.buffer 时省掉文本层编码"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+def _json_dumps(obj, indent: bool = False) -> str:
+    """序列化为 JSON 字符串（优先使用 orjson，速度远高于标准库）"""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, option=option).decode()
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2)
+    return json.dumps(obj, ensure_ascii=False)
+
+
+class Trie:
+    """嵌套字典实现的前缀树，叶子节点的 None 槽挂姓名集合"""
+
+    __slots__ = ('_root',)
+
+    def __init__(self):
+        self._root = {}
+
+    def insert(self, key: str, value: str) -> None:
+        """沿 key 建路径并把 value 挂到末端节点"""
+        node = self._root
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node.setdefault(None, set()).add(value)
+
+    def remove(self, key: str, value: str) -> None:
+        """从 key 末端节点摘掉 value（不回收空节点，姓名规模下不值得）"""
+        node = self._root
+        for ch in key:
+            node = node.get(ch)
+            if node is None:
+                return
+        values = node.get(None)
+        if values is not None:
+            values.discard(value)
+
+    def collect_prefix(self, prefix: str) -> set:
+        """收集所有以 prefix 开头的键挂载的值，复杂度只与子树大小相关"""
+        node = self._root
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None:
+                return set()
+        collected = set()
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            for key, child in current.items():
+                if key is None:
+                    collected |= child
+                else:
+                    stack.append(child)
+        return collected
+
+
+class PersonRecord:
+    """扁平存储的个人信息记录
+
+    用 __slots__ 避免每条记录携带属性字典，嵌套的 birth_time/location
+    结构和派生的 datetime_str 只在序列化时生成。
+    """
+
+    __slots__ = ('name', 'year', 'month', 'day', 'hour', 'minute',
+                 'city', 'latitude', 'longitude', 'gender', 'timezone',
+                 'created_at', 'updated_at', '_dt_str')
+
+    def __init__(self, name, year, month, day, hour, minute, city,
+                 latitude, longitude, gender=None, timezone=None,
+                 created_at=None, updated_at=None):
+        self.name = name
+        self.year = year
+        self.month = month
+        self.day = day
+        self.hour = hour
+        self.minute = minute
+        self.city = city
+        self.latitude = latitude
+        self.longitude = longitude
+        self.gender = gender
+        self.timezone = timezone
+        self.created_at = created_at
+        self.updated_at = updated_at
+        # datetime_str 惰性缓存，出生时间变更时置空
+        self._dt_str = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "PersonRecord":
+        """从磁盘/接口使用的嵌套字典构建记录"""
+        birth_time = data.get('birth_time', {})
+        location = data.get('location', {})
+        return cls(
+            data.get('name'),
+            birth_time.get('year'), birth_time.get('month'), birth_time.get('day'),
+            birth_time.get('hour'), birth_time.get('minute'),
+            location.get('city'), location.get('latitude'), location.get('longitude'),
+            gender=data.get('gender'), timezone=data.get('timezone'),
+            created_at=data.get('created_at'), updated_at=data.get('updated_at'))
+
+    def to_dict(self) -> Dict:
+        """转换成对外输出和落盘使用的嵌套字典"""
+        dt_str = self._dt_str
+        if dt_str is None:
+            dt_str = self._dt_str = _fmt_dt(self.year, self.month, self.day,
+                                            self.hour, self.minute)
+        info = {
+            "name": self.name,
+            "birth_time": {
+                "year": self.year,
+                "month": self.month,
+                "day": self.day,
+                "hour": self.hour,
+                "minute": self.minute,
+                "datetime_str": dt_str
+            },
+            "location": {
+                "city": self.city,
+                "latitude": self.latitude,
+                "longitude": self.longitude
+            },
+            "created_at": self.created_at
+        }
+        if self.gender:
+            info["gender"] = self.gender
+        if self.timezone:
+            info["timezone"] = self.timezone
+        if self.updated_at:
+            info["updated_at"] = self.updated_at
+        return info
+
 
 class PersonInfoManager:
     """个人信息管理类"""
@@ -26,200 +313,404 @@ class PersonInfoManager:
     def __init__(self):
         self.data_file = DATA_FILE
         self.persons = self._load_data()
+        # 写回模式：变更先记在内存里，批量/退出时才落盘
+        self._dirty = False
+        self._pending_mutations = 0
+        # 去抖定时器与锁：落盘可能在主线程或定时器线程触发
+        self._flush_timer: Optional[threading.Timer] = None
+        self._flush_lock = threading.Lock()
+        self._last_payload_hash = None
+        # 变更日志：快照是批量写回的，两次落盘之间靠日志保证持久性
+        self._journal_fh = None
+        if self._replay_journal():
+            self._dirty = True
+        try:
+            self._journal_fh = open(JOURNAL_FILE, 'ab', buffering=1 << 16)
+        except Exception as e:
+            _warn_once(f"打开变更日志错误: {e}")
+        # 姓名 -> 拼音缓存，搜索时直接读，不再对每个名字重复调用 pypinyin
+        self._pinyin_cache: Dict[str, str] = {}
+        # 正/反向前缀树（姓名一对），前后缀搜索按查询长度走索引
+        self._name_trie = Trie()
+        self._name_rtrie = Trie()
+        # 拼音探测固定取前/后两个字符，直接按首/尾二字符分桶，一次哈希命中
+        self._pinyin_by_first2: Dict[str, set] = defaultdict(set)
+        self._pinyin_by_last2: Dict[str, set] = defaultdict(set)
+        # 三元组倒排索引，包含匹配先按 trigram 求交再精确验证
+        self._name_trigrams: Dict[str, set] = defaultdict(set)
+        self._pinyin_trigrams: Dict[str, set] = defaultdict(set)
+        self._build_indexes()
+        atexit.register(self._flush_if_dirty)
+
+    def _build_indexes(self) -> None:
+        """为所有姓名预计算拼音并建立前缀树索引"""
+        if PYPINYIN_AVAILABLE:
+            cjk_names = [name for name in self.persons if _CJK_RE.search(name)]
+            self._pinyin_cache.update(_batch_pinyin(cjk_names))
+        for name in self.persons:
+            self._index_person(name)
+
+    def _index_person(self, name: str) -> None:
+        """把姓名（及其拼音）插入各检索索引"""
+        self._name_trie.insert(name, name)
+        self._name_rtrie.insert(name[::-1], name)
+        name_pinyin = self._pinyin_cache.get(name)
+        if name_pinyin:
+            self._pinyin_by_first2[name_pinyin[:2]].add(name)
+            self._pinyin_by_last2[name_pinyin[-2:]].add(name)
+        for i in range(len(name) - 2):
+            self._name_trigrams[name[i:i + 3]].add(name)
+        if name_pinyin:
+            for i in range(len(name_pinyin) - 2):
+                self._pinyin_trigrams[name_pinyin[i:i + 3]].add(name)
+
+    def _unindex_person(self, name: str) -> None:
+        """把姓名（及其拼音）从各检索索引摘除"""
+        self._name_trie.remove(name, name)
+        self._name_rtrie.remove(name[::-1], name)
+        name_pinyin = self._pinyin_cache.get(name)
+        if name_pinyin:
+            self._pinyin_by_first2[name_pinyin[:2]].discard(name)
+            self._pinyin_by_last2[name_pinyin[-2:]].discard(name)
+        for i in range(len(name) - 2):
+            self._name_trigrams[name[i:i + 3]].discard(name)
+        if name_pinyin:
+            for i in range(len(name_pinyin) - 2):
+                self._pinyin_trigrams[name_pinyin[i:i + 3]].discard(name)
+
+    @staticmethod
+    def _trigram_candidates(index: Dict[str, set], text: str):
+        """按 trigram 倒排表求可能包含 text 的候选（升序求交，交空即止）"""
+        grams = []
+        for i in range(len(text) - 2):
+            posting = index.get(text[i:i + 3])
+            if not posting:
+                return ()
+            grams.append(posting)
+        grams.sort(key=len)
+        candidates = set(grams[0])
+        for posting in grams[1:]:
+            candidates &= posting
+            if not candidates:
+                break
+        return candidates
     
     def _load_data(self) -> Dict:
         """从文件加载数据"""
         try:
             if os.path.exists(self.data_file):
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                # 一次性读入全部字节再解析，避免 json.load 对文件对象的多次小块读取；
+                # 整读场景下缓冲层只多一次拷贝，直接用裸句柄；
+                # 大文件通过 mmap 省掉读入 bytes 对象的整份拷贝
+                with open(self.data_file, 'rb', buffering=0) as f:
+                    if ORJSON_AVAILABLE and os.path.getsize(self.data_file) > MMAP_THRESHOLD:
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                            raw = orjson.loads(memoryview(mm))
+                    else:
+                        data = f.read()
+                        raw = orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+                # intern 键名：同名字符串共享同一对象，字典比较走指针快路径
+                return {sys.intern(name): PersonRecord.from_dict(info)
+                        for name, info in raw.items()}
             return {}
         except Exception as e:
-            print(f"加载数据错误: {e}", file=sys.stderr)
+            _warn_once(f"加载数据错误: {e}")
             return {}
     
     def _save_data(self) -> bool:
         """保存数据到文件"""
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.persons, f, ensure_ascii=False, indent=2)
+            # 先序列化成 bytes，再一次性写入，避免 json.dump 的多次小块写
+            data = {name: record.to_dict() for name, record in self.persons.items()}
+            if ORJSON_AVAILABLE:
+                option = orjson.OPT_APPEND_NEWLINE
+                if PRETTY_SAVE:
+                    option |= orjson.OPT_INDENT_2
+                payload = orjson.dumps(data, option=option)
+            elif PRETTY_SAVE:
+                payload = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+            else:
+                payload = json.dumps(data, ensure_ascii=False,
+                                     separators=(',', ':')).encode('utf-8')
+            # 内容与上次落盘一致时直接跳过
+            payload_hash = hash(payload)
+            if payload_hash == self._last_payload_hash:
+                return True
+
+            # 先写临时文件再原子替换，写到一半崩溃不会损坏原文件
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(self.data_file) or ".",
+                prefix=".person_data_", suffix=".tmp")
+            try:
+                # 整块 payload 一次写出，不经缓冲层
+                with os.fdopen(fd, 'wb', buffering=0) as f:
+                    f.write(payload)
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.data_file)
+            except Exception:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self._last_payload_hash = payload_hash
             return True
         except Exception as e:
-            print(f"保存数据错误: {e}", file=sys.stderr)
+            _warn_once(f"保存数据错误: {e}")
+            return False
+
+    def _replay_journal(self) -> int:
+        """启动时把快照之后的变更日志重放进内存，返回重放的条数"""
+        if not os.path.exists(JOURNAL_FILE):
+            return 0
+        replayed = 0
+        try:
+            with open(JOURNAL_FILE, 'rb') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = _json_loads(line)
+                    except ValueError:
+                        _warn_once("变更日志存在损坏行，已跳过")
+                        continue
+                    op = entry.get("op")
+                    name = entry.get("name")
+                    if not name:
+                        continue
+                    if op == "delete":
+                        self.persons.pop(name, None)
+                    elif entry.get("record"):
+                        self.persons[sys.intern(name)] = PersonRecord.from_dict(entry["record"])
+                    replayed += 1
+        except Exception as e:
+            _warn_once(f"重放变更日志错误: {e}")
+        return replayed
+
+    def _append_journal(self, op: str, name: str, record: Optional[Dict] = None) -> None:
+        """把单次变更追加到日志（O(1) 字节量），快照批量写回期间的持久性靠它"""
+        if self._journal_fh is None:
+            return
+        try:
+            entry = {"op": op, "name": name}
+            if record is not None:
+                entry["record"] = record
+            self._journal_fh.write(_json_dumps_bytes(entry) + b'\n')
+            self._journal_fh.flush()
+        except Exception as e:
+            _warn_once(f"写入变更日志错误: {e}")
+
+    def _truncate_journal(self) -> None:
+        """快照落盘成功后清空变更日志"""
+        if self._journal_fh is None:
+            return
+        try:
+            self._journal_fh.truncate(0)
+            self._journal_fh.seek(0)
+        except Exception as e:
+            _warn_once(f"清空变更日志错误: {e}")
+
+    def _mark_dirty(self) -> None:
+        """标记内存数据已变更，去抖合并一批写入，积压到阈值则立即落盘"""
+        self._dirty = True
+        self._pending_mutations += 1
+        if self._pending_mutations >= FLUSH_EVERY:
+            self._flush_if_dirty()
+            return
+        # 连续变更只保留最后一个定时器，停顿 FLUSH_DEBOUNCE 秒后统一落盘
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+        timer = threading.Timer(FLUSH_DEBOUNCE, self._flush_if_dirty)
+        timer.daemon = True
+        timer.start()
+        self._flush_timer = timer
+
+    def _flush_if_dirty(self) -> bool:
+        """如有未保存的变更则写入磁盘"""
+        with self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return True
+            if self._save_data():
+                self._dirty = False
+                self._pending_mutations = 0
+                self._truncate_journal()
+                return True
             return False
+
+    def flush(self) -> Dict:
+        """立即把内存中的变更写入磁盘"""
+        if not self._dirty:
+            return {"success": True, "message": "没有待保存的变更"}
+        if self._flush_if_dirty():
+            return {"success": True, "message": "数据已保存"}
+        return {"success": False, "error": "保存数据失败"}
     
     def add_person(self, name: str, birth_year: int, birth_month: int, birth_day: int, 
                    birth_hour: int, birth_minute: int, city: str, latitude: float, longitude: float, gender: str = None, timezone: str = None) -> Dict:
         """添加个人信息"""
-        try:
-            # 验证数据
-            if not name or name.strip() == "":
-                return {"success": False, "error": "姓名不能为空"}
-            
-            if name in self.persons:
-                return {"success": False, "error": f"姓名 '{name}' 已存在"}
-            
-            # 验证日期
+        # 验证数据
+        if not name or name.strip() == "":
+            return {"success": False, "error": "姓名不能为空"}
+
+        name = sys.intern(name)
+        if name in self.persons:
+            return {"success": False, "error": f"姓名 '{name}' 已存在"}
+
+        # 验证日期
+        if not _valid_date(birth_year, birth_month, birth_day, birth_hour, birth_minute):
+            return {"success": False, "error": "日期时间格式错误: 无效的日期或时间"}
+
+        # 验证经纬度
+        coord_error = _validate_coords(latitude, longitude)
+        if coord_error:
+            return {"success": False, "error": coord_error}
+
+        # 添加数据（性别和时区可选，未提供时不出现在输出里）
+        record = PersonRecord(
+            name, birth_year, birth_month, birth_day, birth_hour, birth_minute,
+            city, latitude, longitude, gender=gender, timezone=timezone,
+            created_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+        self.persons[name] = record
+        if PYPINYIN_AVAILABLE and _CJK_RE.search(name):
+            self._pinyin_cache[name] = _to_pinyin(name)
+        self._index_person(name)
+        record_dict = record.to_dict()
+        self._append_journal("add", name, record_dict)
+        self._mark_dirty()
+        return {"success": True, "data": record_dict, "message": f"成功添加 '{name}' 的信息"}
+
+    def add_persons(self, persons: List) -> Dict:
+        """批量添加个人信息，整批在内存中完成校验和插入，IO 由写回机制合并"""
+        if not isinstance(persons, list) or not persons:
+            return {"success": False, "error": "persons 必须是非空列表"}
+
+        added = []
+        errors = []
+        for index, entry in enumerate(persons):
+            if not isinstance(entry, dict):
+                errors.append({"index": index, "error": "条目必须是对象"})
+                continue
             try:
-                datetime(birth_year, birth_month, birth_day, birth_hour, birth_minute)
-            except ValueError as e:
-                return {"success": False, "error": f"日期时间格式错误: {e}"}
-            
-            # 验证经纬度
-            if not (-90 <= latitude <= 90):
-                return {"success": False, "error": "纬度必须在-90到90之间"}
-            if not (-180 <= longitude <= 180):
-                return {"success": False, "error": "经度必须在-180到180之间"}
-            
-            # 添加数据
-            person_info = {
-                "name": name,
-                "birth_time": {
-                    "year": birth_year,
-                    "month": birth_month,
-                    "day": birth_day,
-                    "hour": birth_hour,
-                    "minute": birth_minute,
-                    "datetime_str": f"{birth_year:04d}-{birth_month:02d}-{birth_day:02d} {birth_hour:02d}:{birth_minute:02d}"
-                },
-                "location": {
-                    "city": city,
-                    "latitude": latitude,
-                    "longitude": longitude
-                },
-                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            
-            # 添加性别信息（如果提供）
-            if gender:
-                person_info["gender"] = gender
-            
-            # 添加时区信息（如果提供）
-            if timezone:
-                person_info["timezone"] = timezone
-            
-            self.persons[name] = person_info
-            
-            if self._save_data():
-                return {"success": True, "data": person_info, "message": f"成功添加 '{name}' 的信息"}
+                result = self.add_person(**entry)
+            except TypeError as e:
+                result = {"success": False, "error": f"参数错误: {e}"}
+            if result.get("success"):
+                added.append(entry.get("name"))
             else:
-                return {"success": False, "error": "保存数据失败"}
-                
-        except Exception as e:
-            return {"success": False, "error": f"添加失败: {str(e)}"}
+                errors.append({"index": index, "name": entry.get("name"),
+                               "error": result.get("error")})
+
+        return {
+            "success": not errors,
+            "added": added,
+            "count": len(added),
+            "errors": errors,
+            "message": f"成功添加 {len(added)} 条，失败 {len(errors)} 条"
+        }
     
     def get_person(self, name: str) -> Dict:
         """查询个人信息"""
-        try:
-            if name in self.persons:
-                return {"success": True, "data": self.persons[name]}
-            else:
-                return {"success": False, "error": f"未找到姓名为 '{name}' 的信息"}
-        except Exception as e:
-            return {"success": False, "error": f"查询失败: {str(e)}"}
+        # get 带哨兵：存在性检查与取值合并为一次哈希查找
+        person = self.persons.get(name, _MISSING)
+        if person is _MISSING:
+            return {"success": False, "error": f"未找到姓名为 '{name}' 的信息"}
+        return {"success": True, "data": person.to_dict()}
 
-    def search_persons(self, query: str, search_type: str = "fuzzy") -> Dict:
+    def search_persons(self, query: str, search_type: str = "fuzzy",
+                       limit: Optional[int] = None) -> Dict:
         """模糊搜索个人信息
         支持前两个字匹配、后两个字匹配、拼音匹配
         """
-        try:
-            if not query or query.strip() == "":
-                return {"success": False, "error": "查询内容不能为空"}
-
-            matches = []
-
-            # 确保查询字符串长度至少为2个字符
-            if len(query.strip()) < 2:
-                return {"success": False, "error": "查询内容至少需要2个字符"}
-
-            query_clean = query.strip()
-            query_pinyin = self._get_pinyin(query_clean).lower() if PYPINYIN_AVAILABLE else ""
-
-            for name, person_data in self.persons.items():
-                is_match = False
-                match_type = ""
-
-                # 检查是否包含中文字符
-                has_chinese = any(self._is_chinese_char(char) for char in name)
-
-                # 前两个字匹配
-                if len(name) >= 2 and len(query_clean) >= 2:
-                    if name.startswith(query_clean[:2]):
-                        is_match = True
-                        match_type = "前两个字匹配"
-
-                # 后两个字匹配
-                if not is_match and len(name) >= 2 and len(query_clean) >= 2:
-                    if name.endswith(query_clean[-2:]):
-                        is_match = True
-                        match_type = "后两个字匹配"
-
-                # 完全匹配（作为备选）
-                if not is_match and query_clean in name:
-                    is_match = True
-                    match_type = "包含匹配"
-
-                # 拼音匹配（如果有中文且pypinyin可用）
-                if not is_match and has_chinese and PYPINYIN_AVAILABLE and query_pinyin:
-                    name_pinyin = self._get_pinyin(name)
-
-                    # 拼音前两个字匹配
-                    if len(name_pinyin) >= 2 and len(query_pinyin) >= 2:
-                        if name_pinyin.startswith(query_pinyin[:2]):
-                            is_match = True
-                            match_type = "拼音前两个字匹配"
-
-                    # 拼音后两个字匹配
-                    if not is_match and len(name_pinyin) >= 2 and len(query_pinyin) >= 2:
-                        if name_pinyin.endswith(query_pinyin[-2:]):
-                            is_match = True
-                            match_type = "拼音后两个字匹配"
-
-                    # 拼音包含匹配
-                    if not is_match and query_pinyin in name_pinyin:
-                        is_match = True
-                        match_type = "拼音包含匹配"
-
-                if is_match:
-                    match_info = person_data.copy()
-                    match_info["match_type"] = match_type
-                    match_info["search_score"] = self._calculate_match_score(name, query_clean, match_type)
-                    if has_chinese and PYPINYIN_AVAILABLE:
-                        match_info["pinyin"] = self._get_pinyin(name)
-                    matches.append(match_info)
-
-            # 按匹配分数排序
-            matches.sort(key=lambda x: x["search_score"], reverse=True)
-
-            if matches:
-                return {
-                    "success": True,
-                    "data": matches,
-                    "count": len(matches),
-                    "message": f"找到 {len(matches)} 条匹配记录"
-                }
+        if not query or query.strip() == "":
+            return {"success": False, "error": "查询内容不能为空"}
+
+        matches = []
+
+        # 确保查询字符串长度至少为2个字符
+        if len(query.strip()) < 2:
+            return {"success": False, "error": "查询内容至少需要2个字符"}
+
+        query_clean = query.strip()
+        query_pinyin = _query_pinyin(query_clean) if PYPINYIN_AVAILABLE else ""
+
+        # 查询派生的切片在收集候选前算好，循环里不再重复求值
+        q_prefix = query_clean[:2]
+        q_suffix_rev = query_clean[-2:][::-1]
+
+        # 依优先级从索引中收集候选，setdefault 保证每个姓名只保留最高优先级的匹配类型
+        match_types: Dict[str, str] = {}
+
+        # 前两个字匹配 / 后两个字匹配：前缀树查询只与子树大小相关
+        for cand in self._name_trie.collect_prefix(q_prefix):
+            match_types.setdefault(cand, _MT_PREFIX)
+        for cand in self._name_rtrie.collect_prefix(q_suffix_rev):
+            match_types.setdefault(cand, _MT_SUFFIX)
+
+        # 包含匹配（备选）：≥3 字走 trigram 倒排求交，命中后仍精确验证；
+        # 2 字查询 trigram 无法覆盖，保留线性扫描
+        if len(match_types) < len(self.persons):
+            if len(query_clean) >= 3:
+                for name in self._trigram_candidates(self._name_trigrams, query_clean):
+                    if name not in match_types and query_clean in name:
+                        match_types[name] = _MT_CONTAINS
             else:
-                return {"success": False, "error": f"未找到与 '{query}' 匹配的信息"}
+                for name in self.persons:
+                    if name not in match_types and query_clean in name:
+                        match_types[name] = _MT_CONTAINS
 
-        except Exception as e:
-            return {"success": False, "error": f"搜索失败: {str(e)}"}
+        # 拼音匹配（仅中文姓名进了拼音索引）：首/尾二字符桶一次哈希直达
+        if query_pinyin:
+            for cand in self._pinyin_by_first2.get(query_pinyin[:2], ()):
+                match_types.setdefault(cand, _MT_PY_PREFIX)
+            for cand in self._pinyin_by_last2.get(query_pinyin[-2:], ()):
+                match_types.setdefault(cand, _MT_PY_SUFFIX)
+            if len(match_types) < len(self.persons):
+                if len(query_pinyin) >= 3:
+                    for name in self._trigram_candidates(self._pinyin_trigrams, query_pinyin):
+                        if name not in match_types and query_pinyin in self._pinyin_cache.get(name, ""):
+                            match_types[name] = _MT_PY_CONTAINS
+                else:
+                    for name, name_pinyin in self._pinyin_cache.items():
+                        if name not in match_types and query_pinyin in name_pinyin:
+                            match_types[name] = _MT_PY_CONTAINS
+
+        # 先只对 (分数, 姓名) 排序，嵌套结构只为最终返回的条目生成
+        scored = [(self._calculate_match_score(name, query_clean, match_type), name, match_type)
+                  for name, match_type in match_types.items()]
+        if limit is not None and 0 < limit < len(scored):
+            # 只取前 limit 条时用堆选取，O(N log k) 而非全量排序
+            scored = heapq.nlargest(limit, scored, key=lambda item: item[0])
+        else:
+            scored.sort(key=lambda item: item[0], reverse=True)
+
+        for score, name, match_type in scored:
+            match_info = self.persons[name].to_dict()
+            match_info["match_type"] = match_type
+            match_info["search_score"] = score
+            name_pinyin = self._pinyin_cache.get(name)
+            if name_pinyin:
+                match_info["pinyin"] = name_pinyin
+            matches.append(match_info)
+
+        if matches:
+            return {
+                "success": True,
+                "data": matches,
+                "count": len(matches),
+                "message": f"找到 {len(matches)} 条匹配记录"
+            }
+        else:
+            return {"success": False, "error": f"未找到与 '{query}' 匹配的信息"}
 
-    def _calculate_match_score(self, name: str, query: str, match_type: str) -> int:
+    @staticmethod
+    def _calculate_match_score(name: str, query: str, match_type: str) -> int:
         """计算匹配分数"""
-        score = 0
-
-        if match_type == "前两个字匹配":
-            score = 100
-        elif match_type == "后两个字匹配":
-            score = 80
-        elif match_type == "包含匹配":
-            score = 60
-        elif match_type == "拼音前两个字匹配":
-            score = 95
-        elif match_type == "拼音后两个字匹配":
-            score = 75
-        elif match_type == "拼音包含匹配":
-            score = 55
+        score = _BASE_SCORES.get(match_type, 0)
 
         # 如果是完全匹配，额外加分
         if name == query:
@@ -231,335 +722,384 @@ class PersonInfoManager:
 
         return score
 
-    def _get_pinyin(self, text: str) -> str:
-        """将中文转换为拼音"""
-        if not PYPINYIN_AVAILABLE:
-            return ""
-
-        try:
-            # 转换为拼音，不带声调，合并为字符串
-            pinyin_list = pinyin(text, style=Style.NORMAL)
-            return ''.join([item[0] for item in pinyin_list]).lower()
-        except Exception:
-            return ""
-
-    def _is_chinese_char(self, char: str) -> bool:
-        """检查字符是否为中文"""
-        return '\u4e00' <= char <= '\u9fff'
-    
     def list_all_persons(self) -> Dict:
         """列出所有个人信息"""
-        try:
-            if not self.persons:
-                return {"success": True, "data": [], "message": "暂无数据"}
-            
-            persons_list = list(self.persons.values())
-            return {
-                "success": True, 
-                "data": persons_list, 
-                "count": len(persons_list),
-                "message": f"共找到 {len(persons_list)} 条记录"
-            }
-        except Exception as e:
-            return {"success": False, "error": f"查询失败: {str(e)}"}
+        if not self.persons:
+            return {"success": True, "data": {}, "message": "暂无数据"}
+
+        # 返回 {姓名: 信息} 字典，嵌套结构在此处按需生成
+        count = len(self.persons)
+        return {
+            "success": True,
+            "data": {name: record.to_dict() for name, record in self.persons.items()},
+            "count": count,
+            "message": f"共找到 {count} 条记录"
+        }
     
     def update_person(self, name: str, **kwargs) -> Dict:
         """更新个人信息"""
-        try:
-            if name not in self.persons:
-                return {"success": False, "error": f"未找到姓名为 '{name}' 的信息"}
-            
-            person = self.persons[name]
-            updated = False
-            
-            # 更新出生时间
-            if any(k in kwargs for k in ['birth_year', 'birth_month', 'birth_day', 'birth_hour', 'birth_minute']):
-                birth_time = person['birth_time'].copy()
-                if 'birth_year' in kwargs:
-                    birth_time['year'] = kwargs['birth_year']
-                if 'birth_month' in kwargs:
-                    birth_time['month'] = kwargs['birth_month']
-                if 'birth_day' in kwargs:
-                    birth_time['day'] = kwargs['birth_day']
-                if 'birth_hour' in kwargs:
-                    birth_time['hour'] = kwargs['birth_hour']
-                if 'birth_minute' in kwargs:
-                    birth_time['minute'] = kwargs['birth_minute']
-                
-                # 验证新的日期时间
-                try:
-                    datetime(birth_time['year'], birth_time['month'], birth_time['day'], 
-                           birth_time['hour'], birth_time['minute'])
-                    birth_time['datetime_str'] = f"{birth_time['year']:04d}-{birth_time['month']:02d}-{birth_time['day']:02d} {birth_time['hour']:02d}:{birth_time['minute']:02d}"
-                    person['birth_time'] = birth_time
-                    updated = True
-                except ValueError as e:
-                    return {"success": False, "error": f"日期时间格式错误: {e}"}
-            
-            # 更新地点信息
-            if any(k in kwargs for k in ['city', 'latitude', 'longitude']):
-                location = person['location'].copy()
-                if 'city' in kwargs:
-                    location['city'] = kwargs['city']
-                if 'latitude' in kwargs:
-                    if not (-90 <= kwargs['latitude'] <= 90):
-                        return {"success": False, "error": "纬度必须在-90到90之间"}
-                    location['latitude'] = kwargs['latitude']
-                if 'longitude' in kwargs:
-                    if not (-180 <= kwargs['longitude'] <= 180):
-                        return {"success": False, "error": "经度必须在-180到180之间"}
-                    location['longitude'] = kwargs['longitude']
-                
-                person['location'] = location
+        person = self.persons.get(name, _MISSING)
+        if person is _MISSING:
+            return {"success": False, "error": f"未找到姓名为 '{name}' 的信息"}
+        provided = False
+        updated = False
+
+        # 更新出生时间
+        if not _BIRTH_KEYS.isdisjoint(kwargs):
+            provided = True
+            new_year = kwargs.get('birth_year', person.year)
+            new_month = kwargs.get('birth_month', person.month)
+            new_day = kwargs.get('birth_day', person.day)
+            new_hour = kwargs.get('birth_hour', person.hour)
+            new_minute = kwargs.get('birth_minute', person.minute)
+
+            # 先整体校验，再就地写入，校验失败时不会留下半更新的数据
+            if not _valid_date(new_year, new_month, new_day, new_hour, new_minute):
+                return {"success": False, "error": "日期时间格式错误: 无效的日期或时间"}
+            if (new_year, new_month, new_day, new_hour, new_minute) != (
+                    person.year, person.month, person.day, person.hour, person.minute):
+                person.year = new_year
+                person.month = new_month
+                person.day = new_day
+                person.hour = new_hour
+                person.minute = new_minute
+                person._dt_str = None
                 updated = True
-            
-            # 更新性别信息
-            if 'gender' in kwargs:
-                person['gender'] = kwargs['gender']
+
+        # 更新地点信息
+        if not _LOC_KEYS.isdisjoint(kwargs):
+            provided = True
+            # 同样先校验再就地写入
+            if 'latitude' in kwargs or 'longitude' in kwargs:
+                coord_error = _validate_coords(kwargs.get('latitude', person.latitude),
+                                               kwargs.get('longitude', person.longitude))
+                if coord_error:
+                    return {"success": False, "error": coord_error}
+            if 'city' in kwargs and person.city != kwargs['city']:
+                person.city = kwargs['city']
                 updated = True
-            
-            # 更新时区信息
-            if 'timezone' in kwargs:
-                person['timezone'] = kwargs['timezone']
+            if 'latitude' in kwargs and person.latitude != kwargs['latitude']:
+                person.latitude = kwargs['latitude']
                 updated = True
-            
-            if not updated:
-                return {"success": False, "error": "没有提供需要更新的字段"}
-            
-            person['updated_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            if self._save_data():
-                return {"success": True, "data": person, "message": f"成功更新 '{name}' 的信息"}
-            else:
-                return {"success": False, "error": "保存数据失败"}
-                
-        except Exception as e:
-            return {"success": False, "error": f"更新失败: {str(e)}"}
+            if 'longitude' in kwargs and person.longitude != kwargs['longitude']:
+                person.longitude = kwargs['longitude']
+                updated = True
+
+        # 更新性别信息
+        if 'gender' in kwargs:
+            provided = True
+            if person.gender != kwargs['gender']:
+                person.gender = kwargs['gender']
+                updated = True
+
+        # 更新时区信息
+        if 'timezone' in kwargs:
+            provided = True
+            if person.timezone != kwargs['timezone']:
+                person.timezone = kwargs['timezone']
+                updated = True
+
+        if not provided:
+            return {"success": False, "error": "没有提供需要更新的字段"}
+
+        # 字段值与现状完全一致：不打时间戳也不触发落盘
+        if not updated:
+            return {"success": True, "data": person.to_dict(), "message": "数据无变化"}
+
+        person.updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        record_dict = person.to_dict()
+        self._append_journal("update", name, record_dict)
+        self._mark_dirty()
+        return {"success": True, "data": record_dict, "message": f"成功更新 '{name}' 的信息"}
     
     def delete_person(self, name: str) -> Dict:
         """删除个人信息"""
-        try:
-            if name not in self.persons:
-                return {"success": False, "error": f"未找到姓名为 '{name}' 的信息"}
-            
-            deleted_person = self.persons.pop(name)
-            
-            if self._save_data():
-                return {"success": True, "data": deleted_person, "message": f"成功删除 '{name}' 的信息"}
-            else:
-                # 如果保存失败，恢复数据
-                self.persons[name] = deleted_person
-                return {"success": False, "error": "保存数据失败"}
-                
-        except Exception as e:
-            return {"success": False, "error": f"删除失败: {str(e)}"}
+        # pop 带哨兵：存在性检查与取出合并为一次字典操作
+        deleted_person = self.persons.pop(name, _MISSING)
+        if deleted_person is _MISSING:
+            return {"success": False, "error": f"未找到姓名为 '{name}' 的信息"}
+
+        self._unindex_person(name)
+        self._pinyin_cache.pop(name, None)
+        self._append_journal("delete", name)
+        self._mark_dirty()
+        return {"success": True, "data": deleted_person.to_dict(), "message": f"成功删除 '{name}' 的信息"}
 
 
 # 全局管理器实例
 manager = PersonInfoManager()
 
 
+def _call_update_person(arguments: Dict) -> Dict:
+    """update_person 的分发入口：先取出姓名再透传其余字段"""
+    name = arguments.pop("name", None)
+    if not name:
+        return {"success": False, "error": "缺少姓名参数"}
+    return manager.update_person(name, **arguments)
+
+
+# tools/call 分发表：工具名 -> 处理函数，O(1) 查表代替逐个字符串比较
+TOOL_DISPATCH = {
+    "add_person": lambda a: manager.add_person(**a),
+    "add_persons": lambda a: manager.add_persons(a.get("persons")),
+    "get_person": lambda a: manager.get_person(a.get("name")),
+    "search_persons": lambda a: manager.search_persons(a.get("query"), a.get("search_type", "fuzzy"),
+                                                       a.get("limit")),
+    "list_all_persons": lambda a: manager.list_all_persons(),
+    "update_person": _call_update_person,
+    "delete_person": lambda a: manager.delete_person(a.get("name")),
+    "flush": lambda a: manager.flush(),
+}
+
+
+
+# initialize 与 tools/list 的结果是静态的，模块加载时构建并预序列化一次
+_INITIALIZE_RESULT = {
+    "protocolVersion": "2024-11-05",
+    "capabilities": {"tools": {}},
+    "serverInfo": {
+        "name": "person-info-mcp-server",
+        "version": "1.0.0",
+        "description": "个人信息管理服务器 - 支持增删改查个人基本信息"
+    }
+}
+
+_TOOLS_LIST_RESULT = {
+    "tools": [
+        {
+            "name": "add_person",
+            "description": "添加个人信息，包括姓名、出生时间、地点、性别和时区",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string", "description": "姓名"},
+                    "birth_year": {"type": "integer", "description": "出生年份"},
+                    "birth_month": {"type": "integer", "description": "出生月份 (1-12)"},
+                    "birth_day": {"type": "integer", "description": "出生日期 (1-31)"},
+                    "birth_hour": {"type": "integer", "description": "出生小时 (0-23)"},
+                    "birth_minute": {"type": "integer", "description": "出生分钟 (0-59)"},
+                    "city": {"type": "string", "description": "出生城市"},
+                    "latitude": {"type": "number", "description": "纬度 (-90 到 90)"},
+                    "longitude": {"type": "number", "description": "经度 (-180 到 180)"},
+                    "gender": {"type": "string", "description": "性别（可选）"},
+                    "timezone": {"type": "string", "description": "时区（可选，如：Asia/Shanghai, UTC+8等）"}
+                },
+                "required": ["name", "birth_year", "birth_month", "birth_day", "birth_hour", "birth_minute", "city", "latitude", "longitude"]
+            }
+        },
+        {
+            "name": "add_persons",
+            "description": "批量添加个人信息，整批只写一次磁盘，字段同 add_person",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "persons": {
+                        "type": "array",
+                        "description": "个人信息对象列表",
+                        "items": {"type": "object"}
+                    }
+                },
+                "required": ["persons"]
+            }
+        },
+        {
+            "name": "get_person",
+            "description": "根据姓名查询个人信息",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string", "description": "要查询的姓名"}
+                },
+                "required": ["name"]
+            }
+        },
+        {
+            "name": "search_persons",
+            "description": "模糊搜索个人信息，支持前两个字匹配、后两个字匹配",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "搜索关键词（至少2个字符）"},
+                    "search_type": {"type": "string", "description": "搜索类型（默认为fuzzy）", "default": "fuzzy"},
+                    "limit": {"type": "integer", "description": "最多返回的条数（可选，默认全部）"}
+                },
+                "required": ["query"]
+            }
+        },
+        {
+            "name": "list_all_persons",
+            "description": "列出所有已存储的个人信息（以姓名为键的字典）",
+            "inputSchema": {
+                "type": "object",
+                "properties": {},
+                "required": []
+            }
+        },
+        {
+            "name": "update_person",
+            "description": "更新个人信息（可选择性更新字段）",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string", "description": "要更新的姓名"},
+                    "birth_year": {"type": "integer", "description": "出生年份（可选）"},
+                    "birth_month": {"type": "integer", "description": "出生月份（可选）"},
+                    "birth_day": {"type": "integer", "description": "出生日期（可选）"},
+                    "birth_hour": {"type": "integer", "description": "出生小时（可选）"},
+                    "birth_minute": {"type": "integer", "description": "出生分钟（可选）"},
+                    "city": {"type": "string", "description": "出生城市（可选）"},
+                    "latitude": {"type": "number", "description": "纬度（可选）"},
+                    "longitude": {"type": "number", "description": "经度（可选）"},
+                    "gender": {"type": "string", "description": "性别（可选）"},
+                    "timezone": {"type": "string", "description": "时区（可选，如：Asia/Shanghai, UTC+8等）"}
+                },
+                "required": ["name"]
+            }
+        },
+        {
+            "name": "delete_person",
+            "description": "根据姓名删除个人信息",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string", "description": "要删除的姓名"}
+                },
+                "required": ["name"]
+            }
+        },
+        {
+            "name": "flush",
+            "description": "立即把内存中的变更写入磁盘（变更默认批量保存）",
+            "inputSchema": {
+                "type": "object",
+                "properties": {},
+                "required": []
+            }
+        }
+    ]
+}
+
+_INITIALIZE_RESULT_BYTES = _json_dumps_bytes(_INITIALIZE_RESULT)
+_TOOLS_LIST_RESULT_BYTES = _json_dumps_bytes(_TOOLS_LIST_RESULT)
+
+# 静态响应骨架：前缀 + 请求 id + 分隔符 + 预序列化结果，一次写出
+_RESP_PREFIX = b'{"jsonrpc":"2.0","id":'
+_RESP_RESULT_SEP = b',"result":'
+
+# Parse error 的 id 恒为 null，整条响应可完全预序列化
+_PARSE_ERROR_BYTES = _json_dumps_bytes({
+    "jsonrpc": "2.0",
+    "id": None,
+    "error": {"code": -32700, "message": "Parse error"}
+}) + b'\n'
+
+
+def _static_response_bytes(req_id, result_bytes: bytes) -> bytes:
+    """拼出预序列化的静态响应行，仅动态部分是请求 id"""
+    return (_RESP_PREFIX + _json_dumps_bytes(req_id)
+            + _RESP_RESULT_SEP + result_bytes + b'}\n')
+
+
+def _handle_initialize(request, params):
+    """initialize：返回静态响应 bytes，无需再构造 response 字典"""
+    return _static_response_bytes(request.get("id"), _INITIALIZE_RESULT_BYTES)
+
+
+def _handle_tools_list(request, params):
+    """tools/list：同上，结果在导入时已预序列化"""
+    return _static_response_bytes(request.get("id"), _TOOLS_LIST_RESULT_BYTES)
+
+
+def _handle_tools_call(request, params):
+    """tools/call：按工具名分发后包装成 MCP 响应"""
+    tool_name = params.get("name")
+    arguments = params.get("arguments", {})
+
+    handler = TOOL_DISPATCH.get(tool_name)
+    if handler is not None:
+        result = handler(arguments)
+    else:
+        result = {"success": False, "error": f"未知工具: {tool_name}"}
+
+    return {
+        "jsonrpc": "2.0",
+        "id": request.get("id"),
+        "result": {
+            "content": [{"type": "text", "text": _json_dumps(result, indent=True)}],
+            "isError": not result.get("success", False)
+        }
+    }
+
+
+# 顶层 method 分发表，与工具分发表同构：哈希查一次代替逐个字符串比较
+_METHODS = {
+    "initialize": _handle_initialize,
+    "tools/list": _handle_tools_list,
+    "tools/call": _handle_tools_call,
+}
+
+
+def _handle_sigterm(signum, frame):
+    """收到 SIGTERM 时先落盘再退出"""
+    manager._flush_if_dirty()
+    sys.exit(0)
+
+
 def main():
     """主函数 - 处理 MCP 请求"""
-    
-    # 读取标准输入
-    for line in sys.stdin:
+    signal.signal(signal.SIGTERM, _handle_sigterm)
+
+    # 按行读取标准输入（字节流，跳过文本层解码与迭代器协议开销）
+    stdin_readline = sys.stdin.buffer.readline
+    stdout_write = sys.stdout.buffer.write
+    stdout_flush = sys.stdout.buffer.flush
+
+    # 响应先攒进缓冲，stdin 无待读数据时才合并写出并 flush，
+    # 成批请求只触发一次 write/flush 系统调用
+    out_buf: List[bytes] = []
+    while True:
+        line = stdin_readline()
+        if not line:
+            break
         try:
-            request = json.loads(line.strip())
-            method = request.get("method")
-            params = request.get("params", {})
-            
-            if method == "initialize":
-                # 初始化响应
-                response = {
-                    "jsonrpc": "2.0",
-                    "id": request.get("id"),
-                    "result": {
-                        "protocolVersion": "2024-11-05",
-                        "capabilities": {"tools": {}},
-                        "serverInfo": {
-                            "name": "person-info-mcp-server",
-                            "version": "1.0.0",
-                            "description": "个人信息管理服务器 - 支持增删改查个人基本信息"
-                        }
-                    }
-                }
-            
-            elif method == "tools/list":
-                # 返回可用工具列表
-                response = {
-                    "jsonrpc": "2.0",
-                    "id": request.get("id"),
-                    "result": {
-                        "tools": [
-                            {
-                                "name": "add_person",
-                                "description": "添加个人信息，包括姓名、出生时间、地点、性别和时区",
-                                "inputSchema": {
-                                    "type": "object",
-                                    "properties": {
-                                        "name": {"type": "string", "description": "姓名"},
-                                        "birth_year": {"type": "integer", "description": "出生年份"},
-                                        "birth_month": {"type": "integer", "description": "出生月份 (1-12)"},
-                                        "birth_day": {"type": "integer", "description": "出生日期 (1-31)"},
-                                        "birth_hour": {"type": "integer", "description": "出生小时 (0-23)"},
-                                        "birth_minute": {"type": "integer", "description": "出生分钟 (0-59)"},
-                                        "city": {"type": "string", "description": "出生城市"},
-                                        "latitude": {"type": "number", "description": "纬度 (-90 到 90)"},
-                                        "longitude": {"type": "number", "description": "经度 (-180 到 180)"},
-                                        "gender": {"type": "string", "description": "性别（可选）"},
-                                        "timezone": {"type": "string", "description": "时区（可选，如：Asia/Shanghai, UTC+8等）"}
-                                    },
-                                    "required": ["name", "birth_year", "birth_month", "birth_day", "birth_hour", "birth_minute", "city", "latitude", "longitude"]
-                                }
-                            },
-                            {
-                                "name": "get_person",
-                                "description": "根据姓名查询个人信息",
-                                "inputSchema": {
-                                    "type": "object",
-                                    "properties": {
-                                        "name": {"type": "string", "description": "要查询的姓名"}
-                                    },
-                                    "required": ["name"]
-                                }
-                            },
-                            {
-                                "name": "search_persons",
-                                "description": "模糊搜索个人信息，支持前两个字匹配、后两个字匹配",
-                                "inputSchema": {
-                                    "type": "object",
-                                    "properties": {
-                                        "query": {"type": "string", "description": "搜索关键词（至少2个字符）"},
-                                        "search_type": {"type": "string", "description": "搜索类型（默认为fuzzy）", "default": "fuzzy"}
-                                    },
-                                    "required": ["query"]
-                                }
-                            },
-                            {
-                                "name": "list_all_persons",
-                                "description": "列出所有已存储的个人信息",
-                                "inputSchema": {
-                                    "type": "object",
-                                    "properties": {},
-                                    "required": []
-                                }
-                            },
-                            {
-                                "name": "update_person",
-                                "description": "更新个人信息（可选择性更新字段）",
-                                "inputSchema": {
-                                    "type": "object",
-                                    "properties": {
-                                        "name": {"type": "string", "description": "要更新的姓名"},
-                                        "birth_year": {"type": "integer", "description": "出生年份（可选）"},
-                                        "birth_month": {"type": "integer", "description": "出生月份（可选）"},
-                                        "birth_day": {"type": "integer", "description": "出生日期（可选）"},
-                                        "birth_hour": {"type": "integer", "description": "出生小时（可选）"},
-                                        "birth_minute": {"type": "integer", "description": "出生分钟（可选）"},
-                                        "city": {"type": "string", "description": "出生城市（可选）"},
-                                        "latitude": {"type": "number", "description": "纬度（可选）"},
-                                        "longitude": {"type": "number", "description": "经度（可选）"},
-                                        "gender": {"type": "string", "description": "性别（可选）"},
-                                        "timezone": {"type": "string", "description": "时区（可选，如：Asia/Shanghai, UTC+8等）"}
-                                    },
-                                    "required": ["name"]
-                                }
-                            },
-                            {
-                                "name": "delete_person",
-                                "description": "根据姓名删除个人信息",
-                                "inputSchema": {
-                                    "type": "object",
-                                    "properties": {
-                                        "name": {"type": "string", "description": "要删除的姓名"}
-                                    },
-                                    "required": ["name"]
-                                }
-                            }
-                        ]
-                    }
-                }
-            
-            elif method == "tools/call":
-                # 处理工具调用
-                tool_name = params.get("name")
-                arguments = params.get("arguments", {})
-                
-                if tool_name == "add_person":
-                    result = manager.add_person(
-                        arguments.get("name"),
-                        arguments.get("birth_year"),
-                        arguments.get("birth_month"),
-                        arguments.get("birth_day"),
-                        arguments.get("birth_hour"),
-                        arguments.get("birth_minute"),
-                        arguments.get("city"),
-                        arguments.get("latitude"),
-                        arguments.get("longitude"),
-                        arguments.get("gender"),
-                        arguments.get("timezone")
-                    )
-                    
-                elif tool_name == "get_person":
-                    result = manager.get_person(arguments.get("name"))
-
-                elif tool_name == "search_persons":
-                    result = manager.search_persons(
-                        arguments.get("query"),
-                        arguments.get("search_type", "fuzzy")
-                    )
-
-                elif tool_name == "list_all_persons":
-                    result = manager.list_all_persons()
-                    
-                elif tool_name == "update_person":
-                    name = arguments.pop("name", None)
-                    if name:
-                        result = manager.update_person(name, **arguments)
-                    else:
-                        result = {"success": False, "error": "缺少姓名参数"}
-                        
-                elif tool_name == "delete_person":
-                    result = manager.delete_person(arguments.get("name"))
-                    
-                else:
-                    result = {"success": False, "error": f"未知工具: {tool_name}"}
-                
-                response = {
-                    "jsonrpc": "2.0",
-                    "id": request.get("id"),
-                    "result": {
-                        "content": [{"type": "text", "text": json.dumps(result, ensure_ascii=False, indent=2)}],
-                        "isError": not result.get("success", False)
-                    }
-                }
-            
+            request = _json_loads(line)
+            handler = _METHODS.get(request.get("method"))
+
+            if handler is not None:
+                response = handler(request, request.get("params", {}))
             else:
                 response = {
                     "jsonrpc": "2.0",
                     "id": request.get("id"),
                     "error": {"code": -32601, "message": "Method not found"}
                 }
-            
-            # 输出响应
-            print(json.dumps(response, ensure_ascii=False))
-            sys.stdout.flush()
-            
+
+            # 静态响应已是预序列化的完整行
+            if isinstance(response, bytes):
+                out_buf.append(response)
+            else:
+                out_buf.append(_json_dumps_bytes(response) + b'\n')
+
         except json.JSONDecodeError:
-            print(json.dumps({
-                "jsonrpc": "2.0",
-                "id": None,
-                "error": {"code": -32700, "message": "Parse error"}
-            }, ensure_ascii=False))
-            sys.stdout.flush()
+            # orjson.JSONDecodeError 是 json.JSONDecodeError 的子类
+            out_buf.append(_PARSE_ERROR_BYTES)
         except Exception as e:
-            print(json.dumps({
+            out_buf.append(_json_dumps_bytes({
                 "jsonrpc": "2.0",
                 "id": None,
                 "error": {"code": -32603, "message": f"Internal error: {str(e)}"}
-            }, ensure_ascii=False))
-            sys.stdout.flush()
+            }) + b'\n')
+
+        if not select.select([sys.stdin], [], [], 0)[0]:
+            stdout_write(b''.join(out_buf))
+            stdout_flush()
+            out_buf.clear()
+
+    # 标准输入结束：写出缓冲中的剩余响应并保存变更
+    if out_buf:
+        stdout_write(b''.join(out_buf))
+        stdout_flush()
+    manager._flush_if_dirty()
 
 
 if __name__ == "__main__":